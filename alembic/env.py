@@ -5,6 +5,10 @@ from sqlalchemy import pool
 
 from alembic import context
 
+from app.config import settings
+from app.db import Base
+import app.models  # noqa: F401  (registers the models on Base.metadata)
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -14,11 +18,13 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# The database URL comes from the app settings rather than alembic.ini
+# ("%" is escaped for ConfigParser interpolation)
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -1,3 +1,4 @@
 # app/auth/__init__.py
 from .jwt import create_session_token, get_user_id_from_session_token
-from .passwords import hash_password, verify_password
\ No newline at end of file
+from .dependencies import current_user_id, resolve_user_id
+from .passwords import hash_password, verify_password, verify_and_update_password
\ No newline at end of file
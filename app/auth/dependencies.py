@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from app.auth.jwt import get_user_id_from_session_token
+
+_UNSET = object()
+
+
+def resolve_user_id(request: Request) -> Optional[int]:
+    """
+    Verify the request's session_token once and memoize the result on request.state.
+    Returns None if the token is missing or invalid.
+    """
+    user_id = getattr(request.state, "user_id", _UNSET)
+    if user_id is _UNSET:
+        session_token = request.query_params.get("session_token")
+        user_id = get_user_id_from_session_token(session_token)
+        request.state.user_id = user_id
+    return user_id
+
+
+def current_user_id(request: Request) -> int:
+    """FastAPI dependency returning the authenticated user_id, or raising 401."""
+    if not request.query_params.get("session_token"):
+        raise HTTPException(status_code=401, detail="session_token is required")
+
+    user_id = resolve_user_id(request)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired session token")
+    return user_id
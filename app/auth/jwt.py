@@ -1,47 +1,113 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
 from typing import Optional
-import jwt
+import base64
+import binascii
+import hashlib
+import hmac
+import threading
+import time
+
+import orjson
+from cachetools import TTLCache
+
+from app.config import settings, APP_SECRET_KEY_BYTES
+
+# Keyed HMAC state (ipad/opad) prepared once; each sign/verify works on a copy
+_SIGNER = hmac.new(APP_SECRET_KEY_BYTES, digestmod=hashlib.sha256)
+
+# Cache of verified tokens: sha256(token) prefix -> (user_id, exp).
+# Only successful verifications are stored, so invalid tokens are always re-verified.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_token_cache_lock = threading.Lock()
+
+
+def _token_cache_key(token: str) -> str:
+    """Hash the token so raw session tokens never sit in the cache."""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+# The header never varies, so it is encoded once at import
+_HEADER_B64 = _b64url_encode(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
 
-from app.config import settings
 
 def create_session_token(user_id: int) -> str:
-    """ 
+    """
     Create a signed JWT session token for a given user_id.
-    
+
     """
-    now = datetime.now(timezone.utc)
-    exp = now + timedelta(minutes=settings.JWT_EXP_MINUTES)
-    
+    now = int(time.time())
+    exp = now + settings.JWT_EXP_MINUTES * 60
+
     payload = {
         "sub" : str(user_id),
-        "iat" : now.timestamp(),
-        "exp" : exp.timestamp(),
+        "iat" : now,
+        "exp" : exp,
     }
-    token = jwt.encode(payload, settings.APP_SECRET_KEY, algorithm="HS256")
-    return token
+    payload_b64 = _b64url_encode(orjson.dumps(payload))
+    signing_input = b".".join([_HEADER_B64, payload_b64])
+    signer = _SIGNER.copy()
+    signer.update(signing_input)
+    signature = signer.digest()
+    token = signing_input + b"." + _b64url_encode(signature)
+    return token.decode()
 
 
 def get_user_id_from_session_token(token: Optional[str]) -> Optional[int]:
-    """ 
+    """
     Decode JWT and return user_id if valid, else None.
+
+    Verified tokens are cached for a short time; the cached expiry is
+    re-checked on every hit so an expired token is never served.
     """
     if not token:
         return None
-    
+
+    key = _token_cache_key(token)
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+    if cached is not None:
+        user_id, exp = cached
+        if exp > time.time():
+            return user_id
+
+    parts = token.encode().split(b".")
+    if len(parts) != 3:
+        return None
+    header_b64, payload_b64, signature_b64 = parts
+
     try:
-        payload = jwt.decode(token, settings.APP_SECRET_KEY, algorithms=["HS256"])
+        # Constant-time HS256 check; the payload is only decoded once the signature matches
+        signer = _SIGNER.copy()
+        signer.update(header_b64 + b"." + payload_b64)
+        if not hmac.compare_digest(signer.digest(), _b64url_decode(signature_b64)):
+            return None
+        payload = orjson.loads(_b64url_decode(payload_b64))
+        if not isinstance(payload, dict):
+            return None
         sub = payload.get("sub")
-        if not sub:
+        exp = payload.get("exp")
+        if not sub or not isinstance(exp, (int, float)):
             return None
-        return int(sub)
-    
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
+        if exp <= time.time():
+            return None
+        user_id = int(sub)
+
+    except (binascii.Error, ValueError):
         return None
-    
-    
-    
-    
\ No newline at end of file
+
+    with _token_cache_lock:
+        _token_cache[key] = (user_id, exp)
+    return user_id
+
+
+
+
@@ -1,9 +1,24 @@
 from passlib.context import CryptContext
 
-_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config import settings
+
+# New hashes use argon2id (OWASP parameters); existing bcrypt ($2b$) hashes
+# still verify and are flagged for rehash on the next successful login.
+_pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=settings.PASSWORD_HASH_COST,
+    argon2__memory_cost=19 * 1024,
+    argon2__parallelism=1,
+)
 
 def hash_password(password: str) -> str:
     return _pwd_context.hash(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return _pwd_context.verify(password, hashed_password)
\ No newline at end of file
+    return _pwd_context.verify(password, hashed_password)
+
+def verify_and_update_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password and return a replacement hash if the stored one is outdated."""
+    return _pwd_context.verify_and_update(password, hashed_password)
\ No newline at end of file
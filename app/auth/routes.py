@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+import threading
+
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr, Field
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.models import User
 from app.auth.jwt import create_session_token
-from app.auth.passwords import hash_password, verify_password
-from app.auth.jwt import get_user_id_from_session_token
+from app.auth.passwords import hash_password, verify_and_update_password
+from app.auth.dependencies import current_user_id
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# user_id -> (email, name) for /auth/me, so repeated calls skip the users query
+_user_cache: TTLCache[int, tuple[str, str | None]] = TTLCache(maxsize=5000, ttl=60)
+_user_cache_lock = threading.Lock()
+
 class SignupRequest(BaseModel):
     email: EmailStr
     password: str = Field(min_length=8, max_length=128)
@@ -28,21 +37,39 @@ def signup(payload: SignupRequest, db: Session = Depends(get_db)):
     if not payload.email:
         raise HTTPException(status_code = 400, detail = "Email is required")
     
-    existing = db.query(User).filter(User.email==payload.email).first()
+    password_hash = hash_password(payload.password)
     
-    if existing:
-        raise HTTPException(status_code = 400, detail = "User already exists")
-
-    user = User(
-        email = payload.email,
-        name = payload.name,
-        password_hash = hash_password(payload.password),
-    )
-    db.add(user)
+    # Single atomic INSERT; a duplicate email shows up as a conflict instead of a prior SELECT
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = (
+            pg_insert(User)
+            .values(email = payload.email, name = payload.name, password_hash = password_hash)
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(User.id)
+        )
+        user_id = db.execute(stmt).scalar()
+        if user_id is None:
+            db.rollback()
+            raise HTTPException(status_code = 400, detail = "User already exists")
+    else:
+        user = User(
+            email = payload.email,
+            name = payload.name,
+            password_hash = password_hash,
+        )
+        db.add(user)
+        # flush populates user.id from the INSERT; no refresh SELECT needed
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code = 400, detail = "User already exists")
+        user_id = user.id
+    
+    session_token = create_session_token(user_id)
     db.commit()
-    db.refresh(user)
     
-    return AuthResponse(user_id=user.id, session_token=create_session_token(user.id))
+    return AuthResponse(user_id=user_id, session_token=session_token)
 
 @router.post("/login", response_model=AuthResponse)
 def login(payload: LoginRequest, db: Session = Depends(get_db)):
@@ -50,29 +77,38 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    if not verify_password(payload.password, user.password_hash):
+    valid, new_hash = verify_and_update_password(payload.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
+    # Upgrade legacy bcrypt (or outdated-cost) hashes transparently
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+    
     return AuthResponse(user_id=user.id, session_token=create_session_token(user.id))
 
 
 @router.get("/me")
-def me(request: Request, db: Session = Depends(get_db)):
-    session_token = request.query_params.get("session_token")
-    user_id = get_user_id_from_session_token(session_token)
-    
-    if not user_id:
-        raise HTTPException(status_code=401, detail="unauthorized")
+def me(user_id: int = Depends(current_user_id), db: Session = Depends(get_db)):
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
     
-    user = db.query(User).filter(User.id==user_id).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if cached is None:
+        user = db.query(User).filter(User.id==user_id).first()
+        
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        cached = (user.email, user.name)
+        with _user_cache_lock:
+            _user_cache[user_id] = cached
     
+    email, name = cached
     return {
-        "user_id": user.id,
-        "email": user.email,
-        "name": user.name,
+        "user_id": user_id,
+        "email": email,
+        "name": name,
     }
     
     
\ No newline at end of file
@@ -1,21 +1,49 @@
 import os
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class settings:
-    def __init__(self):
-        self.DATABASE_URL: str = os.getenv("DATABASE_URL","")
-         
-        self.SLACK_CLIENT_ID: str = os.getenv("SLACK_CLIENT_ID","")
-        self.SLACK_CLIENT_SECRET: str = os.getenv("SLACK_CLIENT_SECRET","")
-         
-        self.APP_SECRET_KEY: str = os.getenv("APP_SECRET_KEY","")
-        
-        self.SLACK_REDIRECT_URI: str = os.getenv(
+@dataclass(frozen=True, slots=True)
+class Settings:
+    DATABASE_URL: str
+
+    SLACK_CLIENT_ID: str
+    SLACK_CLIENT_SECRET: str = field(repr=False)
+
+    APP_SECRET_KEY: str = field(repr=False)
+
+    SLACK_REDIRECT_URI: str
+
+    JWT_EXP_MINUTES: int
+
+    PASSWORD_HASH_COST: int
+
+    INIT_DB: bool
+
+    MCP_MAX_MESSAGE_BYTES: int
+
+    REDIS_URL: str
+
+
+def _load_settings() -> Settings:
+    """Read configuration from the environment once, at import."""
+    return Settings(
+        DATABASE_URL=os.getenv("DATABASE_URL",""),
+        SLACK_CLIENT_ID=os.getenv("SLACK_CLIENT_ID",""),
+        SLACK_CLIENT_SECRET=os.getenv("SLACK_CLIENT_SECRET",""),
+        APP_SECRET_KEY=os.getenv("APP_SECRET_KEY",""),
+        SLACK_REDIRECT_URI=os.getenv(
             "SLACK_REDIRECT_URI",
-            "https://slack-mcp-server-6809.onrender.com/oauth/slack/callback"        )
-        
-        self.JWT_EXP_MINUTES: int = int(os.getenv("JWT_EXP_MINUTES", "43200"))
+            "https://slack-mcp-server-6809.onrender.com/oauth/slack/callback"        ),
+        JWT_EXP_MINUTES=int(os.getenv("JWT_EXP_MINUTES", "43200")),
+        PASSWORD_HASH_COST=int(os.getenv("PASSWORD_HASH_COST", "2")),
+        INIT_DB=os.getenv("INIT_DB", "").lower() in ("1", "true", "yes"),
+        MCP_MAX_MESSAGE_BYTES=int(os.getenv("MCP_MAX_MESSAGE_BYTES", "65536")),
+        REDIS_URL=os.getenv("REDIS_URL", ""),
+    )
+
+settings = _load_settings()
 
-settings = settings()
\ No newline at end of file
+# Secret key encoded once for the HMAC hot path
+APP_SECRET_KEY_BYTES: bytes = settings.APP_SECRET_KEY.encode("utf-8")
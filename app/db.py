@@ -8,22 +8,27 @@ from app.config import settings
 Base = declarative_base()
 
 # create engine
+# pool sized for concurrent MCP tool calls; pre-ping and recycle drop stale connections
 engine = create_engine(
     settings.DATABASE_URL,
     echo=False,
+    pool_size=20,
+    max_overflow=40,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
 )
 
+# expire_on_commit=False keeps loaded attributes usable after commit without a refresh SELECT
 SessionLocal = sessionmaker(
     autocommit = False,
     autoflush = False,
+    expire_on_commit = False,
     bind = engine,
 )
 
-# helper function to get database session
+# helper function to get database session; the context manager returns the connection to the pool
 def get_db():
-    db = SessionLocal()
-    try:
+    with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
         
\ No newline at end of file
@@ -5,20 +5,49 @@ A Model Context Protocol (MCP) server for Slack integration.
 Uses SSE (Server-Sent Events) transport for remote MCP connections.
 """
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
+
+import msgspec
+import orjson
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import Response
 from mcp.server.sse import SseServerTransport
 
+from app.config import settings
 from app.db import Base, engine
+from app.responses import ORJSONResponse
 from app.oauth.slack import router as slack_oauth_router
 from app.auth.routes import router as auth_router
-from app.auth.jwt import get_user_id_from_session_token
-from app.mcp.server import server as mcp_server, set_current_user, list_tools, call_tool
+from app.auth.dependencies import current_user_id, resolve_user_id
+from app.mcp.server import server as mcp_server, set_current_user, call_tool, TOOLS_LIST_JSON
+from app.mcp.jsonrpc import JsonRpcRequest, rpc_message, rpc_response, static_error, static_result
+from app.slack.http import get_http_client, close_http_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup: create missing tables only when INIT_DB is set (local/dev bootstrap);
+    schema is otherwise managed with `alembic upgrade head`. Also opens the shared
+    HTTP client used for Slack API calls.
+    Shutdown: close the shared HTTP client.
+    """
+    if settings.INIT_DB:
+        Base.metadata.create_all(bind=engine)
+
+    app.state.http = get_http_client()
+    yield
+    await close_http_client()
+
 
 app = FastAPI(
     title="Slack MCP Server",
     description="Model Context Protocol server for Slack integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Include routers
@@ -28,21 +57,56 @@ app.include_router(slack_oauth_router)
 # SSE Transport for MCP connections
 sse_transport = SseServerTransport("/mcp/messages")
 
+# Static /mcp/http results, serialized once; only the request id varies
+_INITIALIZE_RESULT = static_result({
+    "protocolVersion": "2024-11-05",
+    "capabilities": {"tools": {}},
+    "serverInfo": {
+        "name": "slack-mcp-server",
+        "version": "1.0.0"
+    }
+})
+_TOOLS_LIST_RESULT = static_result({"tools": TOOLS_LIST_JSON})
+
+# Fixed /mcp/http error bodies
+_ERR_TOKEN_REQUIRED = static_error(-32001, "session_token is required")
+_ERR_INVALID_TOKEN = static_error(-32001, "Invalid or expired session token")
+_ERR_PARSE = static_error(-32700, "Parse error: Invalid JSON")
+_ERR_TOO_LARGE = static_error(-32600, "Invalid Request: message too large")
+_ERR_EMPTY_BATCH = static_error(-32600, "Invalid Request: empty batch")
+
+# Reusable typed decoder for /mcp/http request bodies: one request or a batch
+_rpc_decoder = msgspec.json.Decoder(JsonRpcRequest | list[msgspec.Raw])
+
+# Batch elements are validated one by one, so a bad element gets its own error
+_batch_item_decoder = msgspec.json.Decoder(JsonRpcRequest)
+
+
+async def _read_body_limited(request: Request) -> bytes | None:
+    """Read the request body, or return None once it exceeds MCP_MAX_MESSAGE_BYTES."""
+    limit = settings.MCP_MAX_MESSAGE_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+        return None
+
+    # Stream the body so an oversized upload is dropped without buffering it all
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
 
 @app.get("/mcp/sse")
-async def mcp_sse_endpoint(request: Request, session_token: str = None):
+async def mcp_sse_endpoint(request: Request, user_id: int = Depends(current_user_id)):
     """
     SSE-based MCP endpoint for AI clients.
     
     Connect using: GET /mcp/sse?session_token=<your_token>
     """
-    if not session_token:
-        raise HTTPException(status_code=401, detail="session_token is required")
-
-    user_id = get_user_id_from_session_token(session_token)
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Invalid or expired session token")
-
     # Set user context for this connection
     set_current_user(user_id)
 
@@ -64,6 +128,77 @@ async def mcp_messages_endpoint(request: Request):
     )
 
 
+async def _handle_initialize(msg_id: Any, params: dict) -> bytes:
+    return rpc_message(msg_id, _INITIALIZE_RESULT)
+
+
+async def _handle_tools_list(msg_id: Any, params: dict) -> bytes:
+    return rpc_message(msg_id, _TOOLS_LIST_RESULT)
+
+
+async def _handle_tools_call(msg_id: Any, params: dict) -> bytes:
+    tool_name = params.get("name", "")
+    tool_args = params.get("arguments", {})
+
+    result = await call_tool(tool_name, tool_args)
+
+    return orjson.dumps({
+        "jsonrpc": "2.0",
+        "id": msg_id,
+        "result": {
+            "content": [
+                {"type": r.type, "text": r.text}
+                for r in result
+            ]
+        }
+    })
+
+
+# JSON-RPC method -> handler for /mcp/http; each returns the serialized response
+_METHOD_HANDLERS: dict[str, Callable[[Any, dict], Awaitable[bytes]]] = {
+    "initialize": _handle_initialize,
+    "tools/list": _handle_tools_list,
+    "tools/call": _handle_tools_call,
+}
+
+
+def _is_notification(msg: JsonRpcRequest) -> bool:
+    return msg.method.startswith("notifications/")
+
+
+async def _dispatch(msg: JsonRpcRequest) -> bytes:
+    """Run one JSON-RPC request and return its serialized response."""
+    handler = _METHOD_HANDLERS.get(msg.method)
+    if handler is None:
+        return rpc_message(msg.id, static_error(-32601, f"Method not found: {msg.method}"))
+    return await handler(msg.id, msg.params)
+
+
+async def _dispatch_batch(batch: list[msgspec.Raw]) -> Response:
+    """
+    Run a JSON-RPC batch concurrently; the reply array omits notifications.
+    Invalid elements are answered with an id-null error, the rest still run.
+    """
+    if not batch:
+        return rpc_response(0, _ERR_EMPTY_BATCH)
+
+    replies: list[bytes] = []
+    calls: list[JsonRpcRequest] = []
+    for raw in batch:
+        try:
+            msg = _batch_item_decoder.decode(raw)
+        except msgspec.ValidationError as e:
+            replies.append(rpc_message(None, static_error(-32600, f"Invalid Request: {e}")))
+            continue
+        if not _is_notification(msg):
+            calls.append(msg)
+
+    replies += await asyncio.gather(*(_dispatch(msg) for msg in calls))
+    if not replies:
+        return Response(status_code=202)
+    return Response(content=b"[" + b",".join(replies) + b"]", media_type="application/json")
+
+
 @app.post("/mcp/http")
 async def mcp_http_endpoint(request: Request, session_token: str = None):
     """
@@ -71,127 +206,64 @@ async def mcp_http_endpoint(request: Request, session_token: str = None):
     
     This is a simpler endpoint that doesn't require SSE.
     Connect using: POST /mcp/http?session_token=<your_token>
+    Accepts a single JSON-RPC request or a batch (array) of them.
     """
-    # Try to parse body first to get request ID
-    msg_id = 0
+    # Parse body first to get request ID; JSON decode and envelope validation happen in one pass
+    msg: JsonRpcRequest | list[msgspec.Raw] | None = None
+    decode_error = None
+    body = await _read_body_limited(request)
+    if body is None:
+        return rpc_response(0, _ERR_TOO_LARGE, status_code=413)
     try:
-        body = await request.json()
-        msg_id = body.get("id", 0)
-    except Exception:
-        body = None
+        msg = _rpc_decoder.decode(body)
+    except msgspec.ValidationError as e:
+        decode_error = static_error(-32600, f"Invalid Request: {e}")
+    except msgspec.DecodeError:
+        decode_error = _ERR_PARSE
+
+    is_single = isinstance(msg, JsonRpcRequest)
+
+    # Notifications get no reply and do no work, so they exit before auth and dispatch
+    if is_single and _is_notification(msg):
+        return Response(status_code=202)
+
+    msg_id = msg.id if is_single else 0
 
     if not session_token:
-        return JSONResponse(
-            status_code=401,
-            content={
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "error": {"code": -32001, "message": "session_token is required"}
-            }
-        )
+        return rpc_response(msg_id, _ERR_TOKEN_REQUIRED, status_code=401)
 
-    user_id = get_user_id_from_session_token(session_token)
+    user_id = resolve_user_id(request)
     if not user_id:
-        return JSONResponse(
-            status_code=401,
-            content={
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "error": {"code": -32001, "message": "Invalid or expired session token"}
-            }
-        )
+        return rpc_response(msg_id, _ERR_INVALID_TOKEN, status_code=401)
 
     # Set user context for this request
     set_current_user(user_id)
 
-    if body is None:
-        return JSONResponse(
-            content={
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "error": {"code": -32700, "message": "Parse error: Invalid JSON"}
-            }
-        )
+    if decode_error is not None:
+        return rpc_response(msg_id, decode_error)
+
+    if not is_single:
+        return await _dispatch_batch(msg)
+    return Response(content=await _dispatch(msg), media_type="application/json")
 
-    method = body.get("method", "")
-    msg_id = body.get("id")
-    params = body.get("params", {})
-
-    # Handle different MCP methods
-    if method == "initialize":
-        return JSONResponse(content={
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {"tools": {}},
-                "serverInfo": {
-                    "name": "slack-mcp-server",
-                    "version": "1.0.0"
-                }
-            }
-        })
-
-    elif method == "tools/list":
-        tools = await list_tools()
-        return JSONResponse(content={
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "tools": [
-                    {
-                        "name": t.name,
-                        "description": t.description,
-                        "inputSchema": t.inputSchema
-                    }
-                    for t in tools
-                ]
-            }
-        })
-
-    elif method == "tools/call":
-        tool_name = params.get("name", "")
-        tool_args = params.get("arguments", {})
-
-        result = await call_tool(tool_name, tool_args)
-
-        return JSONResponse(content={
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "content": [
-                    {"type": r.type, "text": r.text}
-                    for r in result
-                ]
-            }
-        })
-
-    else:
-        return JSONResponse(content={
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "error": {"code": -32601, "message": f"Method not found: {method}"}
-        })
-
-
-@app.on_event("startup")
-def on_startup():
-    """Initialize database tables on startup."""
-    Base.metadata.create_all(bind=engine)
+
+# Static bodies for the info endpoints, serialized once
+_HEALTH_BODY = orjson.dumps({"status": "ok"})
+_ROOT_BODY = orjson.dumps({
+    "name": "Slack MCP Server",
+    "version": "1.0.0",
+    "mcp_endpoint": "/mcp/sse?session_token=<token>",
+    "docs": "/docs"
+})
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
-    return {"status": "ok"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.get("/")
-def root():
+async def root():
     """Root endpoint with API info."""
-    return {
-        "name": "Slack MCP Server",
-        "version": "1.0.0",
-        "mcp_endpoint": "/mcp/sse?session_token=<token>",
-        "docs": "/docs"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
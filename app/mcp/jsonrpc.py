@@ -0,0 +1,45 @@
+"""
+JSON-RPC 2.0 envelope helpers for the /mcp/http endpoint.
+
+Static results are serialized once at import; per request only the id is encoded.
+"""
+
+from typing import Any
+
+import msgspec
+import orjson
+from fastapi.responses import Response
+
+_ENVELOPE_PREFIX = b'{"jsonrpc":"2.0","id":'
+
+
+class JsonRpcRequest(msgspec.Struct):
+    """Incoming JSON-RPC 2.0 request, decoded and validated in one pass."""
+
+    id: int | str | None = 0
+    method: str = ""
+    params: dict[str, Any] = msgspec.field(default_factory=dict)
+
+
+def static_result(result: Any) -> bytes:
+    """Pre-serialize everything that follows the id in a result response."""
+    return b',"result":' + orjson.dumps(result) + b"}"
+
+
+def static_error(code: int, message: str) -> bytes:
+    """Pre-serialize everything that follows the id in an error response."""
+    return b',"error":' + orjson.dumps({"code": code, "message": message}) + b"}"
+
+
+def rpc_message(msg_id: Any, body_suffix: bytes) -> bytes:
+    """Serialize a JSON-RPC response from a pre-serialized suffix and the request id."""
+    return _ENVELOPE_PREFIX + orjson.dumps(msg_id) + body_suffix
+
+
+def rpc_response(msg_id: Any, body_suffix: bytes, status_code: int = 200) -> Response:
+    """Build a JSON-RPC HTTP response from a pre-serialized suffix and the request id."""
+    return Response(
+        content=rpc_message(msg_id, body_suffix),
+        status_code=status_code,
+        media_type="application/json",
+    )
@@ -5,12 +5,24 @@ Provides Slack integration tools for MCP clients.
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
 import contextvars
+import threading
 
-from app.db import SessionLocal
+import httpx
+import msgspec
+from cachetools import TTLCache
+from sqlalchemy import bindparam, select
+
+from app.db import engine
 from app.models import SlackConnection
-from app.slack.client import SlackClient
+from app.slack.client import (
+    CONVERSATIONS_LIST_MAX_LIMIT,
+    PostMessageResponse,
+    SlackClient,
+    SlackApiError,
+)
 
 # Create MCP server instance
 server = Server("slack-mcp")
@@ -20,6 +32,29 @@ _current_user_id: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar
     "current_user_id", default=None
 )
 
+# Latest active bot token for a user. Built once with a bind param so every
+# lookup shares one entry in SQLAlchemy's compiled-statement cache.
+_ACTIVE_TOKEN_STMT = (
+    select(SlackConnection.bot_access_token)
+    .where(
+        SlackConnection.user_id == bindparam("uid"),
+        SlackConnection.status == "active"
+    )
+    .order_by(SlackConnection.installed_at.desc())
+    .limit(1)
+)
+
+# Slack clients per user_id; the bot token rarely changes, so skip the DB lookup on hits
+_slack_client_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_slack_client_cache_lock = threading.Lock()
+
+# Rendered list_channels results per (bot token, limit, include_private). Agents
+# re-list channels often and the list rarely changes within a few seconds.
+_channels_cache: TTLCache = TTLCache(maxsize=1024, ttl=20)
+# Longer-lived copies, served only when Slack is failing
+_channels_stale_cache: TTLCache = TTLCache(maxsize=1024, ttl=600)
+_channels_cache_lock = threading.Lock()
+
 
 def set_current_user(user_id: int) -> None:
     """Set the current user ID for this request context."""
@@ -31,88 +66,127 @@ def get_current_user() -> Optional[int]:
     return _current_user_id.get()
 
 
-@server.list_tools()
-async def list_tools() -> list[Tool]:
-    """Return list of available Slack tools."""
-    return [
-        Tool(
-            name="list_channels",
-            description="List all Slack channels in the connected workspace",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of channels to return (default: 20)"
-                    },
-                    "include_private": {
-                        "type": "boolean",
-                        "description": "Include private channels (default: false)"
-                    }
+class ListChannelsArgs(msgspec.Struct):
+    limit: int = 20
+    include_private: bool = False
+    fetch_all: bool = False
+
+
+class SendMessageArgs(msgspec.Struct):
+    channel_id: str
+    text: str
+    thread_ts: Optional[str] = None
+
+
+class FetchHistoryArgs(msgspec.Struct):
+    channel_id: str
+    limit: int = 10
+
+
+# The tool catalog is static, so it is built (and serialized for /mcp/http) once
+TOOLS: list[Tool] = [
+    Tool(
+        name="list_channels",
+        description="List all Slack channels in the connected workspace",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "limit": {
+                    "type": "number",
+                    "description": "Maximum number of channels to return (default: 20)"
+                },
+                "include_private": {
+                    "type": "boolean",
+                    "description": "Include private channels (default: false)"
+                },
+                "fetch_all": {
+                    "type": "boolean",
+                    "description": "Return every channel, ignoring limit (default: false)"
                 }
             }
-        ),
-        Tool(
-            name="send_message",
-            description="Send a message to a Slack channel",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "The Slack channel ID (e.g., C0A1RJ2D0TV)"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "The message text to send"
-                    },
-                    "thread_ts": {
-                        "type": "string",
-                        "description": "Thread timestamp to reply to (optional)"
-                    }
+        }
+    ),
+    Tool(
+        name="send_message",
+        description="Send a message to a Slack channel",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "channel_id": {
+                    "type": "string",
+                    "description": "The Slack channel ID (e.g., C0A1RJ2D0TV)"
                 },
-                "required": ["channel_id", "text"]
-            }
-        ),
-        Tool(
-            name="fetch_history",
-            description="Fetch message history from a Slack channel",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "The Slack channel ID"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Number of messages to fetch (default: 10, max: 100)"
-                    }
+                "text": {
+                    "type": "string",
+                    "description": "The message text to send"
                 },
-                "required": ["channel_id"]
-            }
-        )
-    ]
+                "thread_ts": {
+                    "type": "string",
+                    "description": "Thread timestamp to reply to (optional)"
+                }
+            },
+            "required": ["channel_id", "text"]
+        }
+    ),
+    Tool(
+        name="fetch_history",
+        description="Fetch message history from a Slack channel",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "channel_id": {
+                    "type": "string",
+                    "description": "The Slack channel ID"
+                },
+                "limit": {
+                    "type": "number",
+                    "description": "Number of messages to fetch (default: 10, max: 100)"
+                }
+            },
+            "required": ["channel_id"]
+        }
+    )
+]
+
+TOOLS_LIST_JSON: list[dict[str, Any]] = [
+    {"name": t.name, "description": t.description, "inputSchema": t.inputSchema}
+    for t in TOOLS
+]
+
+
+@server.list_tools()
+async def list_tools() -> list[Tool]:
+    """Return list of available Slack tools."""
+    return TOOLS
+
+
+def invalidate_slack_client(user_id: int) -> None:
+    """Drop the cached Slack client so the next tool call re-reads the connection."""
+    with _slack_client_cache_lock:
+        _slack_client_cache.pop(user_id, None)
+
+
+def _get_cached_slack_client(user_id: int) -> Optional[SlackClient]:
+    with _slack_client_cache_lock:
+        return _slack_client_cache.get(user_id)
 
 
 def get_slack_client_for_user(user_id: int) -> Optional[SlackClient]:
     """Get Slack client for the specified user."""
-    db = SessionLocal()
-    try:
-        conn = (
-            db.query(SlackConnection)
-            .filter(
-                SlackConnection.user_id == user_id,
-                SlackConnection.status == "active"
-            )
-            .order_by(SlackConnection.installed_at.desc())
-            .first()
-        )
-        if conn and conn.bot_access_token:
-            return SlackClient(conn.bot_access_token)
-        return None
-    finally:
-        db.close()
+    client = _get_cached_slack_client(user_id)
+    if client is not None:
+        return client
+
+    # A plain pooled connection is enough for one scalar read; no ORM Session to build and tear down
+    with engine.connect() as conn:
+        bot_access_token = conn.execute(_ACTIVE_TOKEN_STMT, {"uid": user_id}).scalar()
+
+    if bot_access_token:
+        client = SlackClient(bot_access_token)
+        with _slack_client_cache_lock:
+            _slack_client_cache[user_id] = client
+        return client
+    return None
 
 
 @server.call_tool()
@@ -123,7 +197,20 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     if not user_id:
         return [TextContent(type="text", text="Error: No user context available. Please reconnect.")]
 
-    client = get_slack_client_for_user(user_id)
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
+        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+
+    # Validate before any DB or Slack round-trip; strict=False accepts "10" for an int
+    try:
+        args = msgspec.convert(arguments or {}, TOOL_ARGS[name], strict=False)
+    except msgspec.ValidationError as e:
+        return [TextContent(type="text", text=f"Error: invalid arguments for {name}: {e}")]
+
+    client = _get_cached_slack_client(user_id)
+    if client is None:
+        # Cache miss: the DB lookup is blocking, so keep it off the event loop
+        client = await asyncio.to_thread(get_slack_client_for_user, user_id)
     if not client:
         return [TextContent(
             type="text",
@@ -131,86 +218,202 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         )]
 
     try:
-        if name == "list_channels":
-            return await handle_list_channels(client, arguments)
-        elif name == "send_message":
-            return await handle_send_message(client, arguments)
-        elif name == "fetch_history":
-            return await handle_fetch_history(client, arguments)
-        else:
-            return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        return await handler(client, args)
+
+    except SlackApiError as e:
+        if e.is_auth_error:
+            # Token revoked or rotated elsewhere; re-resolve from the DB on the next call
+            invalidate_slack_client(user_id)
+        return [TextContent(type="text", text=f"Error executing {name}: {str(e)}")]
 
     except Exception as e:
         return [TextContent(type="text", text=f"Error executing {name}: {str(e)}")]
 
 
-async def handle_list_channels(client: SlackClient, arguments: dict) -> list[TextContent]:
+async def handle_list_channels(client: SlackClient, args: ListChannelsArgs) -> list[TextContent]:
     """Handle list_channels tool."""
-    limit = arguments.get("limit", 20)
-    include_private = arguments.get("include_private", False)
+    limit = None if args.fetch_all else args.limit
+    key = (client.bot_access_token, limit, args.include_private)
+    with _channels_cache_lock:
+        cached = _channels_cache.get(key)
+    if cached is not None:
+        return cached
 
-    response = client.list_channels(limit=limit, include_private=include_private)
-    channels = response.get("channels", [])
-
-    if not channels:
+    try:
+        result = await _fetch_channel_list(client, limit, args.include_private)
+    except (SlackApiError, httpx.HTTPError) as e:
+        # Fall back to the last good answer, except when the token itself is bad
+        if isinstance(e, SlackApiError) and e.is_auth_error:
+            raise
+        with _channels_cache_lock:
+            stale = _channels_stale_cache.get(key)
+        if stale is None:
+            raise
+        return stale
+
+    with _channels_cache_lock:
+        _channels_cache[key] = result
+        _channels_stale_cache[key] = result
+    return result
+
+
+async def _collect_channel_lines(
+    client: SlackClient, limit: Optional[int], page_size: int, types: str
+) -> list[str]:
+    """Render up to limit channels of the given types (all if None), one page at a time."""
+    # Format page by page and stop paginating as soon as the limit is reached
+    lines: list[str] = []
+    async for channels in client.iter_channels(page_size=page_size, types=types):
+        if limit is not None:
+            channels = channels[:limit - len(lines)]
+        for ch in channels:
+            lines.append(f"• #{ch.get('name')} (ID: {ch.get('id')}) - {ch.get('num_members', 0)} members")
+        if limit is not None and len(lines) >= limit:
+            break
+    return lines
+
+
+async def _fetch_channel_list(
+    client: SlackClient, limit: Optional[int], include_private: bool
+) -> list[TextContent]:
+    """Page through conversations.list and render up to limit channels (all if None)."""
+    # Cursors are sequential, so a full listing is kept to as few round-trips as possible
+    if limit is None:
+        page_size = CONVERSATIONS_LIST_MAX_LIMIT
+    else:
+        page_size = min(max(limit, 1), 200)
+
+    if include_private and limit is None:
+        # Slack filters types after paginating, so a full combined listing walks more
+        # pages; two single-type listings run side by side instead
+        public, private = await asyncio.gather(
+            _collect_channel_lines(client, None, page_size, "public_channel"),
+            _collect_channel_lines(client, None, page_size, "private_channel"),
+        )
+        lines = public + private
+    else:
+        # A bounded listing stays one walk, so private channels share the limit
+        # with public ones in Slack's order rather than queueing behind them
+        types = "public_channel,private_channel" if include_private else "public_channel"
+        lines = await _collect_channel_lines(client, limit, page_size, types)
+
+    if not lines:
         return [TextContent(type="text", text="No channels found in the workspace.")]
 
-    channel_list = "\n".join([
-        f"• #{ch.get('name')} (ID: {ch.get('id')}) - {ch.get('num_members', 0)} members"
-        for ch in channels
-    ])
+    channel_list = "\n".join(lines)
 
     return [TextContent(
         type="text",
-        text=f"Found {len(channels)} channels:\n\n{channel_list}"
+        text=f"Found {len(lines)} channels:\n\n{channel_list}"
     )]
 
 
-async def handle_send_message(client: SlackClient, arguments: dict) -> list[TextContent]:
+async def handle_send_message(client: SlackClient, args: SendMessageArgs) -> list[TextContent]:
     """Handle send_message tool."""
-    channel_id = arguments.get("channel_id")
-    text = arguments.get("text")
-    thread_ts = arguments.get("thread_ts")
+    channel_id = args.channel_id
+    text = args.text
+    thread_ts = args.thread_ts
 
     if not channel_id or not text:
         return [TextContent(type="text", text="Error: channel_id and text are required")]
 
-    response = client.send_message(
+    response = await client.send_message(
         channel_id=channel_id,
         text=text,
         thread_ts=thread_ts
     )
+    sent = msgspec.convert(response, PostMessageResponse)
+
+    # ts identifies the new message, e.g. for replying in its thread later
+    details = f"ts: {sent.ts}"
+    if sent.message is not None and sent.message.thread_ts:
+        details += f", thread_ts: {sent.message.thread_ts}"
 
     return [TextContent(
         type="text",
-        text=f"✓ Message sent successfully to channel {channel_id}"
+        text=f"✓ Message sent successfully to channel {sent.channel or channel_id} ({details})"
     )]
 
 
-async def handle_fetch_history(client: SlackClient, arguments: dict) -> list[TextContent]:
+async def _resolve_user_names(client: SlackClient, user_ids: set[str]) -> dict[str, str]:
+    """
+    Look up display names for user_ids in one get_user_profiles call.
+    Users that cannot be resolved are left out, so callers fall back to the raw ID.
+    """
+    if not user_ids:
+        return {}
+    try:
+        profiles = await client.get_user_profiles(list(user_ids))
+    except (SlackApiError, httpx.HTTPError):
+        return {}
+
+    names: dict[str, str] = {}
+    for uid, profile in profiles.items():
+        name = profile.get("real_name") or profile.get("display_name")
+        if name:
+            names[uid] = name
+    return names
+
+
+async def handle_fetch_history(client: SlackClient, args: FetchHistoryArgs) -> list[TextContent]:
     """Handle fetch_history tool."""
-    channel_id = arguments.get("channel_id")
-    limit = min(arguments.get("limit", 10), 100)  # Cap at 100
+    channel_id = args.channel_id
+    limit = min(args.limit, 100)  # Cap at 100
 
     if not channel_id:
         return [TextContent(type="text", text="Error: channel_id is required")]
 
-    response = client.fetch_history(channel_id=channel_id, limit=limit)
-    messages = response.get("messages", [])
+    # Slack may return short pages, so keep following the cursor until limit is met
+    messages = []
+    stopped_early = None
+    try:
+        async for msg in client.iter_history(channel_id, page_size=max(limit, 1)):
+            messages.append(msg)
+            if len(messages) >= limit:
+                break
+    except (SlackApiError, httpx.HTTPError) as e:
+        # A later page failing (e.g. rate limited where Slack serves 15 messages
+        # per page) still leaves earlier pages worth returning; a bad token does not
+        if not messages or (isinstance(e, SlackApiError) and e.is_auth_error):
+            raise
+        stopped_early = e
 
     if not messages:
         return [TextContent(type="text", text=f"No messages found in channel {channel_id}")]
 
+    names = await _resolve_user_names(
+        client, {msg["user"] for msg in messages if msg.get("user")}
+    )
+
     formatted_messages = []
     for msg in messages:
         user = msg.get("user", "Unknown")
         text = msg.get("text", "")
-        ts = msg.get("ts", "")
+        if user in names:
+            user = f"{names[user]} ({user})"
         formatted_messages.append(f"[{user}]: {text}")
 
     message_text = "\n\n".join(formatted_messages)
+    header = f"Last {len(messages)} messages from {channel_id}"
+    if stopped_early is not None:
+        header += f" (older messages not fetched: {stopped_early})"
 
     return [TextContent(
         type="text",
-        text=f"Last {len(messages)} messages from {channel_id}:\n\n{message_text}"
+        text=f"{header}:\n\n{message_text}"
     )]
+
+
+# Tool name -> handler, used by call_tool for a single dict lookup per call
+TOOL_HANDLERS: dict[str, Callable[[SlackClient, Any], Awaitable[list[TextContent]]]] = {
+    "list_channels": handle_list_channels,
+    "send_message": handle_send_message,
+    "fetch_history": handle_fetch_history,
+}
+
+# Tool name -> argument struct the raw arguments are converted into
+TOOL_ARGS: dict[str, type[msgspec.Struct]] = {
+    "list_channels": ListChannelsArgs,
+    "send_message": SendMessageArgs,
+    "fetch_history": FetchHistoryArgs,
+}
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from app.db import Base
@@ -22,6 +22,11 @@ class User(Base):
     
 class SlackConnection(Base):
     __tablename__ = "slack_connections"
+    __table_args__ = (
+        # One connection per user and workspace. Leading user_id serves the per-user
+        # token lookup; the pair is the conflict target for the OAuth callback upsert.
+        Index("ix_slack_connections_user_team", "user_id", "slack_team_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index = True)
     
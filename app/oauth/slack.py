@@ -1,54 +1,48 @@
-import secrets
+import asyncio
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from urllib.parse import urlencode
-import httpx
 from fastapi import HTTPException, Depends, Request, APIRouter, Request
 from fastapi.responses import RedirectResponse
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from fastapi.responses import HTMLResponse
 
 from app.config import settings
 from app.db import get_db
-from app.models import SlackConnection, OAuthState
-from app.auth.jwt import get_user_id_from_session_token
+from app.models import SlackConnection
+from app.oauth.state_store import create_oauth_state, consume_oauth_state
+from app.auth.dependencies import current_user_id
+from app.mcp.server import invalidate_slack_client
 
 router = APIRouter(prefix="/oauth/slack", tags=["Slack OAuth"])
 
+# Callback success page, encoded once
+_SUCCESS_HTML = """ 
+        <html>
+            <body style="font-family: Arial, sans-serif; padding: 20px;">
+                <h1>Slack Connection Successful</h1>
+                <p>You can close this window now.</p>
+            </body>
+        
+        </html>
+        """.encode("utf-8")
+
 
 
 @router.get("/start")
-def slack_oauth_start(request: Request, db: Session = Depends(get_db)):
+def slack_oauth_start(user_id: int = Depends(current_user_id), db: Session = Depends(get_db)):
     """ 
     Start the Slack OAuth flow for the current user.
     
     Steps:
-        - Read session_token
-        - Decode it -> user_id
-        - create a random OAuthState and store it in the database
+        - Resolve user_id from the session_token (current_user_id dependency)
+        - create a random single-use OAuth state (Redis or database)
         - Redirect user to slack OAuth URL
     
     """
-    session_token = request.query_params.get("session_token")
-    user_id = get_user_id_from_session_token(session_token)
     
-    if not user_id:
-        raise HTTPException(status_code = 401, detail = "Unauthorized")
-    
-    
-    # Create a DB-Backed OAuth State 
-    state = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(minutes=10)   
-    
-    db_State = OAuthState(
-        provider = "slack",
-        state = state,
-        user_id = user_id,
-        expires_at = expires_at,
-        used = False,
-    )
-    db.add(db_State)
-    db.commit()
+    state = create_oauth_state(db, user_id)
      
     # Slack OAuth authorize url
     base_authorize_url = "https://slack.com/oauth/v2/authorize"
@@ -60,6 +54,7 @@ def slack_oauth_start(request: Request, db: Session = Depends(get_db)):
         "channels:read",
         "groups:read",
         "users:read",
+        "users.profile:read",
     ]
     scope_str = ",".join(scopes)
     
@@ -74,8 +69,70 @@ def slack_oauth_start(request: Request, db: Session = Depends(get_db)):
     url = f"{base_authorize_url}?{urlencode(params)}"
     return RedirectResponse(url)
 
+def _save_slack_connection(
+    db: Session,
+    user_id: int,
+    team_id: str,
+    team_name: Optional[str],
+    access_token: str,
+    scope: str,
+    authed_user_id: Optional[str],
+) -> None:
+    """Insert or update the user's connection to a workspace and commit."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Single atomic upsert on (user_id, slack_team_id); concurrent callbacks cannot duplicate rows
+        stmt = pg_insert(SlackConnection).values(
+            user_id = user_id,
+            slack_team_id = team_id,
+            slack_team_name = team_name,
+            bot_access_token = access_token,
+            scope = scope,
+            authed_user_id = authed_user_id,
+            status = "active",
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "slack_team_id"],
+            set_={
+                "bot_access_token": stmt.excluded.bot_access_token,
+                "scope": stmt.excluded.scope,
+                "authed_user_id": stmt.excluded.authed_user_id,
+                "status": "active",
+                "slack_team_name": stmt.excluded.slack_team_name,
+                "updated_at": datetime.utcnow(),
+            },
+        )
+        db.execute(stmt)
+    else:
+        existing = (
+            db.query(SlackConnection).filter(
+                SlackConnection.user_id == user_id,
+                SlackConnection.slack_team_id == team_id,
+            ).first()
+        )
+        
+        if existing:
+            existing.bot_access_token = access_token
+            existing.scope = scope
+            existing.authed_user_id = authed_user_id
+            existing.status = "active"
+            existing.slack_team_name = team_name
+        else:
+            conn = SlackConnection(
+                user_id = user_id,
+                slack_team_id = team_id,
+                slack_team_name= team_name,
+                bot_access_token = access_token,
+                scope=scope,
+                authed_user_id = authed_user_id,
+                status = "active",
+            )
+            db.add(conn)
+    
+    db.commit()
+
+
 @router.get("/callback")
-def slack_oauth_callback(
+async def slack_oauth_callback(
     request: Request,
     code: Optional[str] = None,
     state: Optional[str] = None,
@@ -86,39 +143,17 @@ def slack_oauth_callback(
     Slack redirects here after the user approves or denies.
     
     Steps:
-        - Validate the State from DB (exists, not used, not expired)
+        - Validate and consume the State (exists, not used, not expired)
         - If error or missing code, fail
         - Exchange code for access token
         - Store/update SlackConnection for the used_id
-        - Mark state as used
     """
     
-    # 1. Validate State
-    if not state:
-        raise HTTPException(status_code = 400, detail = "Invalid or missing state")
-    
-    
-    # 1. Fetch state record From DB
-    st = (
-        db.query(OAuthState).filter(
-        OAuthState.provider == "slack", OAuthState.state == state).first()
-        )
-    
-    if not st:
-        raise HTTPException(status_code = 400, detail = "Invalid or expired state")
-    
-    if st.used:
-        raise HTTPException(status_code = 400, detail = "State already used")
-    
-    if datetime.utcnow() > st.expires_at:
-        raise HTTPException(status_code = 400, detail = "State expired")
-    
-    user_id = st.user_id
+    # 1. Validate State; it is marked used here so it cannot be replayed
+    user_id = await asyncio.to_thread(consume_oauth_state, db, state)
     
     # 2. Handle user denial or error
     if error:
-        st.used = True
-        db.commit()
         raise HTTPException(status_code = 400, detail= f"OAuth error: {error}")
     
     if not code:
@@ -134,10 +169,10 @@ def slack_oauth_callback(
         "redirect_uri": settings.SLACK_REDIRECT_URI,
     }
     
-    with httpx.Client(timeout=20) as client:
-        resp = client.post(token_url, data=data)
-        resp_data = resp.json()
-        
+    # Shared keep-alive client from the app lifespan; awaiting frees the worker during the exchange
+    resp = await request.app.state.http.post(token_url, data=data, timeout=20)
+    resp_data = resp.json()
+
     if not resp_data.get("ok"):
         details = resp_data.get("error", "unknown_error")
         raise HTTPException(
@@ -162,49 +197,15 @@ def slack_oauth_callback(
             detail = "Missing required fields from Slack response",
         )
         
-    # 5. Store or update SlackConnection now
-    
-    existing = (
-        db.query(SlackConnection).filter(
-            SlackConnection.user_id == user_id,
-            SlackConnection.slack_team_id == team_id,
-        ).first()
+    # 5. Store or update SlackConnection now (blocking DB work, kept off the event loop)
+    await asyncio.to_thread(
+        _save_slack_connection,
+        db, user_id, team_id, team_name, access_token, scope, authed_user_id,
     )
-    
-    if existing:
-        existing.bot_access_token = access_token
-        existing.scope = scope
-        existing.authed_user_id = authed_user_id
-        existing.status = "active"
-        existing.slack_team_name = team_name
-    else:
-        conn = SlackConnection(
-            user_id = user_id,
-            slack_team_id = team_id,
-            slack_team_name= team_name,
-            bot_access_token = access_token,
-            scope=scope,
-            authed_user_id = authed_user_id,
-            status = "active",
-        )
-        db.add(conn)
-        
-    
-    # Mark OAuth State as used
-    st.used = True
-    
-    db.commit()
+
+    # Pick up the new bot token on the next tool call
+    invalidate_slack_client(user_id)
 
     # 6. Redirect user back to same page in app
     # redirected to frontend UI
-    return HTMLResponse(
-        """ 
-        <html>
-            <body style="font-family: Arial, sans-serif; padding: 20px;">
-                <h1>Slack Connection Successful</h1>
-                <p>You can close this window now.</p>
-            </body>
-        
-        </html>
-        """
-    )
\ No newline at end of file
+    return HTMLResponse(_SUCCESS_HTML)
\ No newline at end of file
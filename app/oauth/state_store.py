@@ -0,0 +1,94 @@
+"""
+OAuth state storage for the Slack install flow.
+
+When REDIS_URL is set, states live in Redis under a TTL and are consumed
+with GETDEL; otherwise they fall back to the oauth_states table.
+"""
+
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import OAuthState
+
+OAUTH_STATE_TTL_SECONDS = 600
+
+_REDIS_KEY_PREFIX = "slack:oauth:"
+
+# Only imported when configured, so redis stays an optional dependency
+_redis = None
+if settings.REDIS_URL:
+    import redis
+
+    _redis = redis.Redis.from_url(settings.REDIS_URL)
+
+
+def create_oauth_state(db: Session, user_id: int) -> str:
+    """Create a single-use state for user_id and return it."""
+    state = secrets.token_urlsafe(32)
+
+    if _redis is not None:
+        _redis.setex(_REDIS_KEY_PREFIX + state, OAUTH_STATE_TTL_SECONDS, user_id)
+        return state
+
+    db.add(OAuthState(
+        provider = "slack",
+        state = state,
+        user_id = user_id,
+        expires_at = datetime.utcnow() + timedelta(seconds=OAUTH_STATE_TTL_SECONDS),
+        used = False,
+    ))
+    db.commit()
+    return state
+
+
+def consume_oauth_state(db: Session, state: Optional[str]) -> int:
+    """
+    Validate a state and mark it used, returning its user_id.
+
+    Raises HTTPException(400) if the state is missing, unknown, used or expired.
+    """
+    if not state:
+        raise HTTPException(status_code = 400, detail = "Invalid or missing state")
+
+    if _redis is not None:
+        # GETDEL reads and removes in one round-trip; expired keys are already gone
+        raw = _redis.getdel(_REDIS_KEY_PREFIX + state)
+        if raw is None:
+            raise HTTPException(status_code = 400, detail = "Invalid or expired state")
+        return int(raw)
+
+    # Check and mark used in one UPDATE, so two callbacks cannot both claim the state
+    user_id = db.execute(
+        update(OAuthState)
+        .where(
+            OAuthState.provider == "slack",
+            OAuthState.state == state,
+            OAuthState.used.is_(False),
+            OAuthState.expires_at >= datetime.utcnow(),
+        )
+        .values(used = True)
+        .returning(OAuthState.user_id)
+    ).scalar()
+    db.commit()
+    if user_id is not None:
+        return user_id
+
+    # Rejected: look the row up only to report why
+    st = (
+        db.query(OAuthState).filter(
+        OAuthState.provider == "slack", OAuthState.state == state).first()
+        )
+
+    if not st:
+        raise HTTPException(status_code = 400, detail = "Invalid or expired state")
+
+    if st.used:
+        raise HTTPException(status_code = 400, detail = "State already used")
+
+    raise HTTPException(status_code = 400, detail = "State expired")
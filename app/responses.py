@@ -0,0 +1,19 @@
+"""
+Shared response classes.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson instead of the stdlib json module.
+
+    Defined locally because fastapi.responses.ORJSONResponse is deprecated.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
@@ -2,11 +2,67 @@
 Slack API Client - Wrapper for Slack Web API.
 """
 
-from typing import Optional, Any, Dict
+from typing import Optional, Any, AsyncIterator, Dict, List
+import asyncio
+import threading
+
 import httpx
+import msgspec
+import orjson
+from cachetools import TTLCache
+
+from app.slack.http import get_http_client
 
 SLACK_API_BASE_URL = "https://slack.com/api"
 
+# endpoint -> full URL, filled on first use; the set of endpoints is small and fixed
+_endpoint_urls: Dict[str, str] = {}
+
+
+def _endpoint_url(endpoint: str) -> str:
+    url = _endpoint_urls.get(endpoint)
+    if url is None:
+        url = _endpoint_urls[endpoint] = f"{SLACK_API_BASE_URL}/{endpoint}"
+    return url
+
+# Largest pages conversations.list and conversations.history accept ("under 1000")
+CONVERSATIONS_LIST_MAX_LIMIT = 999
+CONVERSATIONS_HISTORY_MAX_LIMIT = 999
+
+# get_user_profiles: up to this many uncached users are fetched one by one with
+# users.profile.get; larger sets page through users.list first
+USER_PROFILE_GET_MAX = 10
+USERS_LIST_PAGE_SIZE = 200
+# users.list is Tier 2, so a lookup reads at most this many pages
+USERS_LIST_MAX_PAGES = 3
+
+# HTTP 429 handling in SlackClient._request: total tries, and the longest single wait
+RATE_LIMIT_MAX_ATTEMPTS = 4
+RATE_LIMIT_MAX_WAIT = 10.0
+
+# Slack error codes meaning the bot token itself is no longer usable
+SLACK_AUTH_ERRORS = frozenset({
+    "invalid_auth",
+    "not_authed",
+    "token_revoked",
+    "token_expired",
+    "account_inactive",
+})
+
+
+class PostedMessage(msgspec.Struct):
+    """The message object inside a chat.postMessage response."""
+
+    thread_ts: Optional[str] = None
+
+
+class PostMessageResponse(msgspec.Struct):
+    """Fields of a chat.postMessage response that callers use."""
+
+    channel: Optional[str] = None
+    ts: Optional[str] = None
+    message: Optional[PostedMessage] = None
+
 
 class SlackApiError(Exception):
     """Exception raised when Slack API returns an error."""
@@ -15,38 +71,81 @@ class SlackApiError(Exception):
         super().__init__(message)
         self.slack_error = slack_error
 
+    @property
+    def is_auth_error(self) -> bool:
+        """True if the error means the bot token was revoked or is invalid."""
+        return self.slack_error in SLACK_AUTH_ERRORS
+
+
+# users.info responses per (bot token, user id); profiles rarely change and the
+# endpoint is rate limited, so repeat lookups (e.g. history authors) stay local
+_user_info_cache: TTLCache = TTLCache(maxsize=10_000, ttl=1800)
+_user_info_cache_lock = threading.Lock()
+
+# User profile objects per (bot token, user id), filled by get_user_profiles
+_user_profile_cache: TTLCache = TTLCache(maxsize=10_000, ttl=1800)
+_user_profile_cache_lock = threading.Lock()
+
 
 class SlackClient:
     """
-    Thin wrapper around Slack web API using a bot access token.
+    Thin async wrapper around Slack web API using a bot access token.
     """
 
-    def __init__(self, bot_access_token: str):
+    def __init__(self, bot_access_token: str, http_client: Optional[httpx.AsyncClient] = None):
         if not bot_access_token:
             raise ValueError("bot_access_token is required")
         self.bot_access_token = bot_access_token
+        self._http_client = http_client
+        # Auth headers are fixed for the client's lifetime, so build them once
+        self._headers = {"Authorization": f"Bearer {bot_access_token}"}
+        self._json_headers = {
+            **self._headers,
+            "Content-Type": "application/json; charset=utf-8",
+        }
 
-    def _request(
+    async def _request(
         self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Internal helper to send a HTTP request to Slack API and handle basic errors.
         """
-        url = f"{SLACK_API_BASE_URL}/{endpoint}"
+        url = _endpoint_url(endpoint)
 
-        headers = {
-            "Authorization": f"Bearer {self.bot_access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
+        client = self._http_client or get_http_client()
+        is_post = method.upper() == "POST"
+        # POST bodies go as JSON (keeps bools and nesting intact); GET args as query params
+        body = orjson.dumps(data or {}) if is_post else None
 
-        # Slack expects form-encoded for most web API endpoints
-        with httpx.Client() as client:
-            if method.upper() == "POST":
-                resp = client.post(url, data=data or {}, headers=headers)
+        for attempt in range(RATE_LIMIT_MAX_ATTEMPTS):
+            if is_post:
+                resp = await client.post(url, content=body, headers=self._json_headers)
             else:
-                resp = client.get(url, params=data or {}, headers=headers)
+                resp = await client.get(url, params=data or {}, headers=self._headers)
 
-        resp_data = resp.json()
+            if resp.status_code != 429 or attempt == RATE_LIMIT_MAX_ATTEMPTS - 1:
+                break
+
+            # Rate limited: wait as long as Slack asks (exponential if it doesn't say),
+            # but give up rather than stall a tool call past RATE_LIMIT_MAX_WAIT
+            retry_after = resp.headers.get("Retry-After")
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else 2.0 ** attempt
+            if delay > RATE_LIMIT_MAX_WAIT:
+                break
+            await asyncio.sleep(delay)
+
+        # An outage (e.g. 503 with an HTML page) has no Slack error body to parse;
+        # 429 falls through, since Slack sends a JSON "ratelimited" body with it
+        if resp.status_code != 429 and not resp.is_success:
+            error_code = f"http_{resp.status_code}"
+            raise SlackApiError(f"Slack API Error: {error_code}", slack_error=error_code)
+
+        # httpx has already undone gzip; orjson parses large channel/history pages faster
+        try:
+            resp_data = orjson.loads(resp.content)
+        except orjson.JSONDecodeError:
+            # e.g. a proxy error page, or a 429 without Slack's JSON body
+            raise SlackApiError("Slack API Error: invalid_response", slack_error="invalid_response")
 
         if not resp_data.get("ok"):
             error_code = resp_data.get("error", "unknown_error")
@@ -56,7 +155,7 @@ class SlackClient:
 
     # Public methods
 
-    def send_message(
+    async def send_message(
         self,
         channel_id: str,
         text: str,
@@ -77,34 +176,58 @@ class SlackClient:
         if reply_broadcast is not None:
             data["reply_broadcast"] = reply_broadcast
 
-        return self._request("POST", "chat.postMessage", data=data)
+        return await self._request("POST", "chat.postMessage", data=data)
 
-    def list_channels(
+    async def list_channels(
         self,
         limit: int = 100,
         cursor: Optional[str] = None,
         include_private: bool = False,
+        types: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         List conversations (channels) using conversations.list.
+        An explicit 'types' (e.g. "private_channel") overrides include_private.
         Returns Slack's raw response JSON (ok already checked).
         """
         # Slack 'types' parameter controls which kinds of conversations are returned
-        types = ["public_channel"]
-        if include_private:
-            types.append("private_channel")
+        if types is None:
+            types = "public_channel,private_channel" if include_private else "public_channel"
 
         data: Dict[str, Any] = {
             "limit": limit,
-            "types": ",".join(types),
+            "types": types,
         }
 
         if cursor:
             data["cursor"] = cursor
 
-        return self._request("GET", "conversations.list", data=data)
+        return await self._request("GET", "conversations.list", data=data)
+
+    async def iter_channels(
+        self,
+        page_size: int = CONVERSATIONS_LIST_MAX_LIMIT,
+        include_private: bool = False,
+        types: Optional[str] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield pages of channels from conversations.list, following next_cursor.
+        Stop iterating early to skip the remaining pages.
+        """
+        cursor: Optional[str] = None
+        while True:
+            response = await self.list_channels(
+                limit=page_size, cursor=cursor, include_private=include_private, types=types
+            )
+            channels = response.get("channels", [])
+            if channels:
+                yield channels
+
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return
 
-    def fetch_history(
+    async def fetch_history(
         self,
         channel_id: str,
         limit: int = 10,
@@ -117,7 +240,7 @@ class SlackClient:
         
         Args:
             channel_id: The channel ID to fetch history from
-            limit: Number of messages to return (default: 10, max: 100)
+            limit: Number of messages to return (default: 10, max: 999)
             cursor: Pagination cursor for next page
             oldest: Only messages after this Unix timestamp
             latest: Only messages before this Unix timestamp
@@ -127,7 +250,7 @@ class SlackClient:
         """
         data: Dict[str, Any] = {
             "channel": channel_id,
-            "limit": min(limit, 100),  # Slack max is 100
+            "limit": min(limit, CONVERSATIONS_HISTORY_MAX_LIMIT),
         }
 
         if cursor:
@@ -137,9 +260,32 @@ class SlackClient:
         if latest:
             data["latest"] = latest
 
-        return self._request("GET", "conversations.history", data=data)
+        return await self._request("GET", "conversations.history", data=data)
+
+    async def iter_history(
+        self,
+        channel_id: str,
+        page_size: int = CONVERSATIONS_HISTORY_MAX_LIMIT,
+        oldest: Optional[str] = None,
+        latest: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield messages from conversations.history newest first, following next_cursor.
+        Stop iterating early to skip the remaining pages.
+        """
+        cursor: Optional[str] = None
+        while True:
+            response = await self.fetch_history(
+                channel_id, limit=page_size, cursor=cursor, oldest=oldest, latest=latest
+            )
+            for message in response.get("messages", []):
+                yield message
+
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return
 
-    def get_user_info(self, user_id: str) -> Dict[str, Any]:
+    async def get_user_info(self, user_id: str) -> Dict[str, Any]:
         """
         Get information about a user.
         
@@ -147,6 +293,125 @@ class SlackClient:
             user_id: The Slack user ID
             
         Returns:
-            Slack's response JSON with user info
+            Slack's response JSON with user info (cached for 30 minutes)
+        """
+        key = (self.bot_access_token, user_id)
+        with _user_info_cache_lock:
+            cached = _user_info_cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = await self._request("GET", "users.info", data={"user": user_id})
+        with _user_info_cache_lock:
+            _user_info_cache[key] = response
+        return response
+
+    async def get_user_profiles(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        return self._request("GET", "users.info", data={"user": user_id})
+        Get profile objects for several users, keyed by user ID.
+
+        Uncached users are fetched concurrently with users.profile.get when
+        there are at most USER_PROFILE_GET_MAX of them; otherwise up to
+        USERS_LIST_MAX_PAGES of users.list are read first, and users still
+        missing after that go to users.profile.get. Users Slack reports as not
+        found get an empty profile; others it cannot return are left out.
+        Profiles are cached for 30 minutes.
+        """
+        profiles: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        with _user_profile_cache_lock:
+            for user_id in dict.fromkeys(user_ids):
+                cached = _user_profile_cache.get((self.bot_access_token, user_id))
+                if cached is not None:
+                    profiles[user_id] = cached
+                else:
+                    missing.append(user_id)
+
+        if len(missing) > USER_PROFILE_GET_MAX:
+            listed = await self._list_profiles(set(missing))
+            profiles.update(listed)
+            # Not in the pages read: past the page budget, a failed page, or users
+            # outside the directory (e.g. Slack Connect); any beyond the cap stay unresolved
+            missing = [user_id for user_id in missing if user_id not in listed]
+            missing = missing[:USER_PROFILE_GET_MAX]
+
+        if missing:
+            profiles.update(await self._fetch_profiles(missing))
+        return profiles
+
+    def _cache_profiles(self, profiles: Dict[str, Dict[str, Any]]) -> None:
+        with _user_profile_cache_lock:
+            for user_id, profile in profiles.items():
+                _user_profile_cache[(self.bot_access_token, user_id)] = profile
+
+    async def _fetch_profiles(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch profiles one by one with users.profile.get, concurrently."""
+        results = await asyncio.gather(
+            *(self._fetch_profile(user_id) for user_id in user_ids), return_exceptions=True
+        )
+        fetched: Dict[str, Dict[str, Any]] = {}
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, SlackApiError) and not result.is_auth_error:
+                if result.slack_error == "user_not_found":
+                    # Cache the miss so every lookup doesn't ask again
+                    fetched[user_id] = {}
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            fetched[user_id] = result
+
+        self._cache_profiles(fetched)
+        return fetched
+
+    async def _fetch_profile(self, user_id: str) -> Dict[str, Any]:
+        try:
+            response = await self._request("GET", "users.profile.get", data={"user": user_id})
+        except SlackApiError as e:
+            # Installs from before users.profile:read was requested can still use users.info
+            if e.slack_error != "missing_scope":
+                raise
+            response = await self.get_user_info(user_id)
+            return (response.get("user") or {}).get("profile") or {}
+        return response.get("profile") or {}
+
+    async def _list_profiles(self, wanted: set[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Page through users.list for the wanted users, reading at most
+        USERS_LIST_MAX_PAGES pages. Every profile seen is cached as its page
+        arrives, and a failed page ends the walk with what was found so far.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        cursor: Optional[str] = None
+        for _ in range(USERS_LIST_MAX_PAGES):
+            data: Dict[str, Any] = {"limit": USERS_LIST_PAGE_SIZE}
+            if cursor:
+                data["cursor"] = cursor
+            try:
+                response = await self._request("GET", "users.list", data=data)
+            except (SlackApiError, httpx.HTTPError) as e:
+                if isinstance(e, SlackApiError) and e.is_auth_error:
+                    raise
+                break
+
+            page = {
+                member["id"]: member.get("profile") or {}
+                for member in response.get("members", [])
+                if member.get("id")
+            }
+            self._cache_profiles(page)
+            found.update((user_id, page[user_id]) for user_id in wanted & page.keys())
+            if len(found) == len(wanted):
+                break
+
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                break
+        return found
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop cached users.info and profile data so the next lookup hits Slack."""
+        key = (self.bot_access_token, user_id)
+        with _user_info_cache_lock:
+            _user_info_cache.pop(key, None)
+        with _user_profile_cache_lock:
+            _user_profile_cache.pop(key, None)
@@ -0,0 +1,37 @@
+"""
+Shared outbound HTTP client.
+
+One pooled AsyncClient serves every outbound call the server makes
+(Slack Web API, OAuth token exchange), so they share keep-alive
+connections and TLS sessions.
+"""
+
+from typing import Optional
+
+import httpx
+
+# Slack answers within seconds; connecting or waiting on the pool should fail sooner
+_TIMEOUT = httpx.Timeout(10.0, connect=5.0, pool=5.0)
+
+# Agents call tools seconds apart; keep idle connections past httpx's 5s default
+# so consecutive calls skip the TCP + TLS handshake
+_LIMITS = httpx.Limits(max_keepalive_connections=100, keepalive_expiry=30.0)
+
+# Process-wide HTTP client so Slack calls reuse pooled keep-alive connections
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(http2=True, timeout=_TIMEOUT, limits=_LIMITS)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared AsyncClient (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
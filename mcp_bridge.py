@@ -10,6 +10,7 @@ Configuration:
     Set these environment variables or create a .env file:
     - SLACK_MCP_TOKEN: Your session token from the Slack MCP server
     - SLACK_MCP_URL: (Optional) Base URL of your MCP server
+    - SLACK_MCP_LOG_LEVEL: (Optional) Log level for stderr output (default: INFO)
 
 Usage:
     1. Create a .env file with your SLACK_MCP_TOKEN
@@ -20,8 +21,12 @@ Usage:
 import sys
 import json
 import asyncio
+import logging
 import os
-from typing import Optional, Any
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Optional
 
 # Load environment variables
 try:
@@ -30,6 +35,18 @@ try:
 except ImportError:
     pass
 
+# orjson is optional; fall back to the stdlib so the bridge runs with just httpx
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
 try:
     import httpx
 except ImportError:
@@ -40,14 +57,115 @@ except ImportError:
     }), flush=True)
     sys.exit(1)
 
+# HTTP/2 lets concurrent requests share one connection; needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Configuration from environment
 SESSION_TOKEN = os.getenv("SLACK_MCP_TOKEN", "")
 MCP_SERVER_URL = os.getenv("SLACK_MCP_URL", "https://slack-mcp-server-6809.onrender.com")
+LOG_LEVEL = os.getenv("SLACK_MCP_LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("slack_mcp_bridge")
+
+# Fail fast on connect/pool waits; tool calls may legitimately take a while to read.
+# A few long-lived connections are plenty, since HTTP/2 multiplexes over one
+_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
+_LIMITS = httpx.Limits(max_keepalive_connections=4, keepalive_expiry=90.0)
+
+# Longest stdin line (one JSON-RPC message) the bridge will buffer
+STDIN_LINE_LIMIT = 16 * 1024 * 1024
+
+# Requests forwarded concurrently before the bridge stops reading stdin
+MAX_IN_FLIGHT = 16
+
+# Catalog methods whose answers rarely change; cached locally for LIST_CACHE_TTL seconds
+CACHEABLE_METHODS = frozenset({"tools/list", "resources/list", "prompts/list"})
+LIST_CACHE_TTL = 60.0
+
+# Buffered stdout is flushed at the end of each event-loop pass, or early past this size
+STDOUT_FLUSH_BYTES = 16 * 1024
+
+# Notifications outside the "notifications/" namespace; none of them get a reply
+NOTIFICATION_METHODS = frozenset({"initialized"})
+
+# Requests arriving within BATCH_WINDOW seconds of each other go out as one
+# JSON-RPC batch POST of at most BATCH_MAX requests
+BATCH_WINDOW = 0.005
+BATCH_MAX = 8
+
+# JSON-RPC "Parse error" code; what servers without batch support answer an array with
+PARSE_ERROR = -32700
 
+# Batches are split so no POST body exceeds this; half the server's default
+# MCP_MAX_MESSAGE_BYTES, leaving room for deployments that set it lower
+BATCH_MAX_BYTES = 32 * 1024
 
-def log(message: str):
-    """Log to stderr (stdout is reserved for JSON-RPC)."""
-    print(f"[Bridge] {message}", file=sys.stderr, flush=True)
+
+def setup_logging() -> QueueListener:
+    """
+    Log to stderr (stdout is reserved for JSON-RPC).
+
+    Records go through a queue so the actual stderr write happens on the
+    listener thread, not on the event loop.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("[Bridge] %(message)s"))
+
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
+class StdoutWriter:
+    """
+    Buffer JSON-RPC lines for stdout and flush them together.
+
+    A flush is scheduled for the end of the current event-loop pass, so
+    replies written in the same pass (e.g. one batch) share a single write
+    without holding any reply back; a large buffer is flushed immediately.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._buffer = bytearray()
+        self._flush_scheduled = False
+
+    def write(self, line: bytes) -> None:
+        self._buffer += line
+        if len(self._buffer) >= STDOUT_FLUSH_BYTES:
+            self.flush()
+        elif not self._flush_scheduled:
+            try:
+                asyncio.get_running_loop().call_soon(self.flush)
+            except RuntimeError:
+                # No loop running: nothing would run a deferred flush
+                self.flush()
+                return
+            self._flush_scheduled = True
+
+    def flush(self) -> None:
+        self._flush_scheduled = False
+        if self._buffer:
+            self._stream.write(self._buffer)
+            self._buffer.clear()
+            self._stream.flush()
+
+
+stdout_writer = StdoutWriter(sys.stdout.buffer)
+
+
+def write_message(message: dict) -> None:
+    """Queue one JSON-RPC message as a line on stdout."""
+    stdout_writer.write(_dumps(message) + b"\n")
 
 
 def make_response(msg_id: Any, result: dict) -> dict:
@@ -59,6 +177,17 @@ def make_response(msg_id: Any, result: dict) -> dict:
     }
 
 
+# Fixed-shape error line for terminal writes; only the id, code and message vary
+ERROR_TEMPLATE = b'{"jsonrpc":"2.0","id":%s,"error":{"code":%d,"message":%s}}\n'
+
+
+def write_error(msg_id: Any, code: int, message: str) -> None:
+    """Write a JSON-RPC error line straight from ERROR_TEMPLATE, skipping the dict."""
+    stdout_writer.write(ERROR_TEMPLATE % (
+        _dumps(msg_id if msg_id is not None else 0), code, _dumps(message)
+    ))
+
+
 def make_error(msg_id: Any, code: int, message: str) -> dict:
     """Create a properly formatted JSON-RPC error response."""
     return {
@@ -68,88 +197,370 @@ def make_error(msg_id: Any, code: int, message: str) -> dict:
     }
 
 
+def handle_initialize(request: dict) -> dict:
+    """Answer initialize locally for a faster handshake."""
+    logger.info("Initialized locally")
+    return make_response(request.get("id", 0), {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {"tools": {}},
+        "serverInfo": {
+            "name": "slack-mcp-bridge",
+            "version": "1.0.0"
+        }
+    })
+
+
+# Methods the bridge answers itself; everything else is forwarded to the server
+LOCAL_HANDLERS: dict[str, Callable[[dict], dict]] = {
+    "initialize": handle_initialize,
+}
+
+
+class BridgeError(Exception):
+    """A server reply the bridge reports to the client as a JSON-RPC error."""
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _is_cacheable(request: dict) -> bool:
+    # Paginated calls (params with a cursor) always go to the server
+    return request.get("method") in CACHEABLE_METHODS and not request.get("params")
+
+
 class HTTPBridge:
     """Bridge between stdio and HTTP MCP transports."""
 
-    def __init__(self, base_url: str, token: str):
+    def __init__(self, base_url: str, token: str, client: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url.rstrip("/")
         self.token = token
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Fixed for the bridge's lifetime, so built once
+        self._url = f"{self.base_url}/mcp/http?session_token={token}"
+        # An injected client is shared with its owner, who is responsible for closing it
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=_TIMEOUT, limits=_LIMITS, http2=HTTP2_AVAILABLE
+        )
+        # method -> (monotonic time stored, last successful response)
+        self._cache: dict[str, tuple[float, dict]] = {}
+        # Cleared for the session once the server turns out not to accept batches
+        self._batching = True
+
+    def _from_cache(self, request: dict, stale: bool = False) -> Optional[dict]:
+        """Return the cached answer for a catalog request, re-addressed to its id."""
+        if not _is_cacheable(request):
+            return None
+        cached = self._cache.get(request["method"])
+        if cached is None:
+            return None
+        stored_at, response = cached
+        msg_id = request.get("id", 0)
+        if stale:
+            # Server unreachable: answer with the last known catalog, flagged as stale
+            return {**response, "id": msg_id, "result": {**response["result"], "_meta": {"stale": True}}}
+        if time.monotonic() - stored_at >= LIST_CACHE_TTL:
+            return None
+        return {**response, "id": msg_id}
+
+    def _store(self, request: dict, response: dict) -> None:
+        if _is_cacheable(request) and "result" in response:
+            self._cache[request["method"]] = (time.monotonic(), response)
+
+    async def _post(self, body: bytes) -> Any:
+        """POST a serialized request or batch to the MCP server and return the decoded body."""
+        response = await self.client.post(self._url, content=body, headers=_JSON_HEADERS)
+
+        if response.status_code == 404:
+            raise BridgeError("MCP endpoint not found. Server may not be deployed yet.")
+
+        response.raise_for_status()
+        result = _loads(response.content)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Got response: %.200s", _dumps(result).decode("utf-8"))
+        return result
+
+    def _error_for(self, request: dict, exc: Exception) -> dict:
+        """Log a failed POST and turn it into the reply for one request."""
+        msg_id = request.get("id", 0)
+        if isinstance(exc, BridgeError):
+            logger.warning("Server error: %s", exc)
+            return make_error(msg_id, -32000, str(exc))
+        if isinstance(exc, httpx.HTTPStatusError):
+            logger.warning("HTTP Error: %s - %.200s", exc.response.status_code, exc.response.text)
+            return make_error(msg_id, -32000, f"HTTP Error: {exc.response.status_code}")
+        if isinstance(exc, httpx.ConnectError):
+            logger.warning("Connection error: %s", exc)
+            stale = self._from_cache(request, stale=True)
+            if stale is not None:
+                return stale
+            return make_error(msg_id, -32000, "Cannot connect to MCP server")
+        logger.warning("Request error: %s", exc)
+        return make_error(msg_id, -32000, str(exc))
 
     async def send_request(self, request: dict) -> dict:
         """Send a request to the MCP server via POST."""
-        url = f"{self.base_url}/mcp/http?session_token={self.token}"
-        msg_id = request.get("id", 0)
+        cached = self._from_cache(request)
+        if cached is not None:
+            logger.debug("Serving %s from cache", request["method"])
+            return cached
 
         try:
-            log(f"Sending to: {url}")
-            response = await self.client.post(
-                url,
-                json=request,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 404:
-                log("Server returned 404 - endpoint not found")
-                return make_error(msg_id, -32000, "MCP endpoint not found. Server may not be deployed yet.")
-            
-            response.raise_for_status()
-            result = response.json()
-            log(f"Got response: {json.dumps(result)[:200]}")
-            
+            logger.debug("Sending %s to %s", request.get("method"), self.base_url)
+            result = await self._post(_dumps(request))
+
             # Ensure the response has a valid id
             if result.get("id") is None:
-                result["id"] = msg_id
-            
-            return result
-            
+                result["id"] = request.get("id", 0)
+        except Exception as e:
+            return self._error_for(request, e)
+
+        self._store(request, result)
+        return result
+
+    async def send_batch(self, requests: list[dict]) -> list[dict]:
+        """
+        Send requests as JSON-RPC batch POSTs of at most BATCH_MAX_BYTES each.
+
+        Cached catalog requests are answered locally; a lone remaining request,
+        or any request once the server is known not to accept batches, goes
+        through send_request.
+        """
+        responses = []
+        to_send = []
+        for request in requests:
+            cached = self._from_cache(request)
+            if cached is not None:
+                responses.append(cached)
+            else:
+                to_send.append(request)
+
+        if len(to_send) <= 1 or not self._batching:
+            return responses + await self._send_each(to_send)
+
+        # Replies are matched back by id, so a request whose id is missing or
+        # repeats an earlier one in the batch is sent on its own
+        seen_ids: set = set()
+        solo: list[dict] = []
+        batchable: list[dict] = []
+        for request in to_send:
+            msg_id = request.get("id")
+            if not isinstance(msg_id, (str, int)) or msg_id in seen_ids:
+                solo.append(request)
+            else:
+                seen_ids.add(msg_id)
+                batchable.append(request)
+
+        # Split by serialized size so a burst of large calls never trips the server's body cap
+        chunks: list[list[tuple[dict, bytes]]] = [[]]
+        size = 0
+        for request in batchable:
+            body = _dumps(request)
+            if chunks[-1] and size + len(body) + 1 > BATCH_MAX_BYTES:
+                chunks.append([])
+                size = 0
+            chunks[-1].append((request, body))
+            size += len(body) + 1
+
+        for replies in await asyncio.gather(
+            self._send_each(solo), *(self._send_chunk(chunk) for chunk in chunks if chunk)
+        ):
+            responses.extend(replies)
+        return responses
+
+    async def _send_chunk(self, chunk: list[tuple[dict, bytes]]) -> list[dict]:
+        """POST one size-capped slice of a batch and match the replies back by id."""
+        requests = [request for request, _ in chunk]
+        if len(chunk) == 1 or not self._batching:
+            return await self._send_each(requests)
+
+        try:
+            logger.debug("Sending batch of %d to %s", len(chunk), self.base_url)
+            replies = await self._post(b"[" + b",".join(body for _, body in chunk) + b"]")
         except httpx.HTTPStatusError as e:
-            log(f"HTTP Error: {e.response.status_code} - {e.response.text[:200]}")
-            return make_error(msg_id, -32000, f"HTTP Error: {e.response.status_code}")
-        except httpx.ConnectError as e:
-            log(f"Connection error: {e}")
-            return make_error(msg_id, -32000, "Cannot connect to MCP server")
+            if e.response.status_code != 413:
+                return [self._error_for(request, e) for request in requests]
+            # Still over a server limit set below BATCH_MAX_BYTES: each request may fit alone
+            logger.info("Batch too large for the server; sending requests individually")
+            return await self._send_each(requests)
         except Exception as e:
-            log(f"Request error: {e}")
-            return make_error(msg_id, -32000, str(e))
+            return [self._error_for(request, e) for request in requests]
+
+        if not isinstance(replies, list):
+            # A server without batch support answers the array with one parse error
+            # (-32700); only that turns batching off for the session. Any other
+            # single reply rejected this batch alone, so its requests are resent
+            if (replies.get("error") or {}).get("code") == PARSE_ERROR:
+                logger.info("Server does not accept batches; sending requests individually")
+                self._batching = False
+            else:
+                logger.warning("Batch rejected: %.200s", _dumps(replies).decode("utf-8"))
+            return await self._send_each(requests)
+
+        responses = []
+        by_id = {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+        for request in requests:
+            reply = by_id.get(request.get("id"))
+            if reply is None:
+                reply = make_error(request.get("id"), -32000, "No response for request in batch")
+            else:
+                self._store(request, reply)
+            responses.append(reply)
+        return responses
+
+    async def _send_each(self, requests: list[dict]) -> list[dict]:
+        """Send requests as separate concurrent POSTs, in order."""
+        return list(await asyncio.gather(*(self.send_request(request) for request in requests)))
 
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Close the HTTP client, unless it was passed in."""
+        if self._owns_client:
+            await self.client.aclose()
+
+
+async def open_stdin_reader() -> Optional[asyncio.StreamReader]:
+    """
+    Attach stdin to an asyncio StreamReader so lines are read on the event loop.
+    Returns None where the loop cannot watch stdin (e.g. Windows, or a regular file).
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
+    protocol = asyncio.StreamReaderProtocol(reader)
+    try:
+        await loop.connect_read_pipe(lambda: protocol, sys.stdin)
+    except (NotImplementedError, OSError, ValueError):
+        return None
+    return reader
 
 
-async def read_stdin_line() -> Optional[str]:
-    """Read a line from stdin asynchronously."""
-    loop = asyncio.get_event_loop()
+async def _skip_rest_of_line(reader: asyncio.StreamReader, consumed: int) -> None:
+    """Discard an over-long line: the consumed bytes already buffered, then up to its newline."""
+    while True:
+        await reader.readexactly(consumed)
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.IncompleteReadError:
+            return  # EOF in the middle of the line
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+
+
+async def read_stdin_line(
+    reader: Optional[asyncio.StreamReader],
+    loop: asyncio.AbstractEventLoop,
+    stdin_readline: Callable[[], bytes],
+) -> Optional[bytes]:
+    """
+    Read a line from stdin asynchronously. Returns None at EOF.
+
+    A line longer than STDIN_LINE_LIMIT is dropped with a warning and read
+    as an empty line, so the bridge keeps running.
+
+    loop and stdin_readline are looked up once by the caller, since they
+    never change for the life of the bridge.
+    """
+    if reader is not None:
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            line = e.partial  # last line without a newline; empty at EOF
+        except asyncio.LimitOverrunError as e:
+            logger.warning("Dropping stdin message longer than %d bytes", STDIN_LINE_LIMIT)
+            await _skip_rest_of_line(reader, e.consumed)
+            return b""
+    else:
+        # Fallback: blocking readline on the default thread pool
+        line = await loop.run_in_executor(None, stdin_readline)
+    if not line:
+        return None
+    return line.strip()
+
+
+async def forward(bridge: HTTPBridge, batch: list[dict], in_flight: asyncio.Semaphore) -> None:
+    """Forward a batch and write its responses; replies may go out of order."""
     try:
-        line = await loop.run_in_executor(None, sys.stdin.readline)
-        if line:
-            return line.strip()
-        return ""  # Empty string means EOF
-    except Exception:
-        return ""
+        responses = await bridge.send_batch(batch)
+        # write_message does not await, so concurrent replies never interleave on stdout
+        for response in responses:
+            write_message(response)
+        logger.debug("Responses sent for %d request(s)", len(batch))
+    finally:
+        for _ in batch:
+            in_flight.release()
+
+
+async def run_batcher(
+    bridge: HTTPBridge,
+    requests: asyncio.Queue,
+    in_flight: asyncio.Semaphore,
+) -> None:
+    """
+    Group queued requests into batches and forward each without waiting for the reply.
+
+    A batch is the first waiting request plus whatever arrives within
+    BATCH_WINDOW, up to BATCH_MAX. A None on the queue means stdin is done.
+    """
+    loop = asyncio.get_running_loop()
+    pending: set[asyncio.Task] = set()
+    done = False
+
+    while not done:
+        first = await requests.get()
+        if first is None:
+            break
+
+        batch = [first]
+        deadline = loop.time() + BATCH_WINDOW
+        while len(batch) < BATCH_MAX:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(requests.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if request is None:
+                done = True
+                break
+            batch.append(request)
+
+        task = asyncio.create_task(forward(bridge, batch, in_flight))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    # Let requests already sent finish before the client is closed
+    if pending:
+        await asyncio.gather(*pending)
 
 
 async def main():
     """Main bridge loop."""
     # Validate configuration
     if not SESSION_TOKEN:
-        error = make_error(0, -32000, "SLACK_MCP_TOKEN not set. Create a .env file with your session token.")
-        print(json.dumps(error), flush=True)
+        write_error(0, -32000, "SLACK_MCP_TOKEN not set. Create a .env file with your session token.")
+        stdout_writer.flush()
         sys.exit(1)
 
-    log("Starting Slack MCP Bridge...")
-    log(f"Server: {MCP_SERVER_URL}")
+    listener = setup_logging()
+    logger.info("Starting Slack MCP Bridge...")
+    logger.info("Server: %s", MCP_SERVER_URL)
 
     bridge = HTTPBridge(MCP_SERVER_URL, SESSION_TOKEN)
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    requests: asyncio.Queue = asyncio.Queue()
+    batcher = asyncio.create_task(run_batcher(bridge, requests, in_flight))
+
+    reader = await open_stdin_reader()
+    loop = asyncio.get_running_loop()
+    stdin_readline = sys.stdin.buffer.readline
 
     try:
         while True:
-            line = await read_stdin_line()
+            line = await read_stdin_line(reader, loop, stdin_readline)
 
             # EOF detection
-            if line == "":
-                log("EOF received, shutting down")
+            if line is None:
+                logger.info("EOF received, shutting down")
                 break
 
             # Skip empty lines (just whitespace)
@@ -157,49 +568,44 @@ async def main():
                 continue
 
             try:
-                request = json.loads(line)
+                request = _loads(line)
             except json.JSONDecodeError as e:
-                log(f"Invalid JSON: {e}")
+                logger.warning("Invalid JSON: %s", e)
                 continue
 
             method = request.get("method", "")
             msg_id = request.get("id", 0)
 
-            log(f"Request: {method} (id={msg_id})")
+            logger.debug("Request: %s (id=%s)", method, msg_id)
 
             # Handle notifications (no response needed)
-            if method.startswith("notifications/") or method == "initialized":
-                log(f"Notification: {method}")
+            if method in NOTIFICATION_METHODS or method.startswith("notifications/"):
+                logger.debug("Notification: %s", method)
                 continue
 
-            # Handle initialize locally for faster response
-            if method == "initialize":
-                response = make_response(msg_id, {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {"tools": {}},
-                    "serverInfo": {
-                        "name": "slack-mcp-bridge",
-                        "version": "1.0.0"
-                    }
-                })
-                print(json.dumps(response), flush=True)
-                log("Initialized locally")
+            handler = LOCAL_HANDLERS.get(method)
+            if handler is not None:
+                write_message(handler(request))
                 continue
 
-            # Forward all other requests to remote server
-            response = await bridge.send_request(request)
-            print(json.dumps(response), flush=True)
-            log(f"Response sent for: {method}")
+            # Queue all other requests for the batcher, which coalesces bursts into
+            # one POST; the semaphore bounds how many are in flight
+            await in_flight.acquire()
+            requests.put_nowait(request)
+
+        requests.put_nowait(None)
+        await batcher
 
     except KeyboardInterrupt:
-        log("Interrupted")
+        logger.info("Interrupted")
     except Exception as e:
-        log(f"Error: {e}")
-        error = make_error(0, -32000, str(e))
-        print(json.dumps(error), flush=True)
+        logger.error("Error: %s", e)
+        write_error(0, -32000, str(e))
     finally:
+        stdout_writer.flush()
         await bridge.close()
-        log("Bridge stopped")
+        logger.info("Bridge stopped")
+        listener.stop()
 
 
 if __name__ == "__main__":